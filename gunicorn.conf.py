@@ -0,0 +1,25 @@
+"""
+Gunicorn configuration for the PharmOS ML service
+Runs the FastAPI app in several Uvicorn worker processes so CPU-bound predictions use every core
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('API_PORT', '8000')}"
+
+# One worker per core; WEB_CONCURRENCY overrides for constrained containers
+workers = int(os.getenv("WEB_CONCURRENCY", max(2, os.cpu_count() or 1)))
+# UvicornWorker subclass that adds a per-worker concurrency limit (see src/api/workers.py)
+worker_class = "src.api.workers.PharmOSUvicornWorker"
+
+# Absorb connection bursts and keep idle client sockets open between calls
+# (UvicornWorker takes its keep-alive timeout from this setting)
+backlog = 4096
+keepalive = 30
+
+# Import the app (and the ML models) once in the master so workers share it copy-on-write
+preload_app = True
+
+# Per-request access logging is a serialized write on every call
+accesslog = None
+loglevel = "info"
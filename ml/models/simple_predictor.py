@@ -4,170 +4,324 @@ Uses basic feature engineering and simple models for demo purposes
 """
 
 import numpy as np
-from typing import Dict, Any, List
-import random
+from typing import Dict, Any, List, Tuple
+from functools import lru_cache
+from collections import namedtuple, OrderedDict
 import hashlib
+import re
+import threading
+
+_ATOM_BYTES = b'CNOSPFLBRI'
+_DIGIT_BYTES = frozenset(b'0123456789')
+
+def _extract_all(buf: bytes) -> Tuple[int, int, int, int]:
+    """Count atoms, heteroatoms, double bonds and distinct ring digits with C-level bytes operations"""
+    upper = buf.upper()
+    # 'NOSPFCLBRI' contains C (from CL), so atoms and heteroatoms share one alphabet
+    atoms = len(upper) - len(upper.translate(None, _ATOM_BYTES))
+    return atoms, atoms, upper.count(b'='), len(_DIGIT_BYTES.intersection(upper))
+
+# Bracket atoms and %nn closures are matched whole so their digits are never relabelled
+_RING_TOKEN_RE = re.compile(r'\[[^\]]*\]|%[0-9]{2}|[0-9]')
+_RING_LABELS = '1234567890'
+
+def _canonicalize_ring_ids(smiles: str) -> str:
+    """Renumber single-digit ring closures in order of first appearance"""
+    mapping = {}
+
+    def relabel(match):
+        token = match.group(0)
+        if len(token) != 1:
+            return token
+        if token not in mapping:
+            mapping[token] = _RING_LABELS[len(mapping)]
+        return mapping[token]
+
+    return _RING_TOKEN_RE.sub(relabel, smiles)
+
+# Simple (old, new) substitutions used to generate analogs, built once at import
+_ANALOG_MODIFICATIONS = (
+    ('F', 'Cl'),
+    ('Cl', 'Br'),
+    ('O', 'S'),
+    ('N', 'O'),
+    ('C', 'N'),
+    ('=', ''),
+    ('C', 'CC'),
+    (')', ')C')
+)
+
+# Property predictions are returned as a namedtuple; MLService converts to a dict for the API
+PropertyPrediction = namedtuple(
+    'PropertyPrediction',
+    'molecular_weight logP solubility_log_mol_l bioavailability_score '
+    'synthetic_accessibility drug_likeness toxicity_risk'
+)
+
+# Activity predictions likewise skip the per-call dict until the API boundary
+ActivityPrediction = namedtuple(
+    'ActivityPrediction',
+    'target pIC50 IC50_nM activity_class confidence'
+)
+
+# Toxicity categories and levels shared by every prediction instead of rebuilt per call
+_RISK_CATEGORIES = ('mutagenicity', 'tumorigenicity', 'irritant', 'reproductive')
+_RISK_LOW = 'low'
+_RISK_MEDIUM = 'medium'
+_RISK_HIGH = 'high'
+
+def _seed_for(key: str) -> int:
+    """Derive a stable 32-bit RNG seed from a cache key"""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=4).digest(), 'big')
+
+# Longer SMILES are computed but never cached, so entry-count limits also bound memory
+CACHE_MAX_KEY_LENGTH = 256
+
+class _LRUCache:
+    """Thread-safe LRU mapping that, unlike lru_cache, can be probed and filled separately"""
+    
+    def __init__(self, maxsize: int):
+        self._maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+    
+    def put(self, key, value):
+        """Store value under key, evicting the least recently used entry when full"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
 
 class SimpleMolecularPredictor:
     """Simple predictor that works without external dependencies"""
     
     def __init__(self):
         self.model_version = "0.1.0"
-        self.feature_extractors = {
-            'atom_count': self._count_atoms,
-            'ring_count': self._count_rings,
-            'double_bonds': self._count_double_bonds,
-            'heteroatoms': self._count_heteroatoms,
-            'complexity': self._calculate_complexity
-        }
+        # Feature counts keyed by ring-renumbered SMILES, so equivalent inputs share entries
+        self._cached_counts = lru_cache(maxsize=65536)(self._scan_counts)
+        self._cached_predictions = _LRUCache(maxsize=100_000)
+        self._local = threading.local()
+    
+    def _complexity_from_counts(self, atoms: int, rings: int, bonds: int, hetero: int) -> float:
+        """Combine precomputed feature counts into a complexity score"""
+        return (atoms + rings + bonds + hetero) * 1.5
+    
+    def _scan_counts(self, smiles: str) -> Tuple[int, int, int, int]:
+        """Count atoms, rings, double bonds and heteroatoms"""
+        atoms, hetero, bonds, rings = _extract_all(smiles.encode())
+        return atoms, rings, bonds, hetero
     
-    def _count_atoms(self, smiles: str) -> int:
-        """Count heavy atoms in SMILES"""
-        return len([c for c in smiles if c.isalpha() and c.upper() in 'CNOSPFCLBRI'])
-    
-    def _count_rings(self, smiles: str) -> int:
-        """Estimate ring count from digit pairs"""
-        digits = [c for c in smiles if c.isdigit()]
-        return len(set(digits))
-    
-    def _count_double_bonds(self, smiles: str) -> int:
-        """Count double bonds"""
-        return smiles.count('=')
-    
-    def _count_heteroatoms(self, smiles: str) -> int:
-        """Count non-carbon atoms"""
-        return len([c for c in smiles.upper() if c in 'NOSPFCLBRI'])
-    
-    def _calculate_complexity(self, smiles: str) -> float:
-        """Calculate molecular complexity score"""
-        features = {
-            'atoms': self._count_atoms(smiles),
-            'rings': self._count_rings(smiles),
-            'bonds': self._count_double_bonds(smiles),
-            'hetero': self._count_heteroatoms(smiles)
+    def _counts_for_key(self, key: str) -> Tuple[int, int, int, int]:
+        """Feature counts for a ring-canonicalized SMILES, cached unless the key is very long"""
+        if len(key) > CACHE_MAX_KEY_LENGTH:
+            return self._scan_counts(key)
+        return self._cached_counts(key)
+    
+    def _features_for_key(self, key: str) -> Dict[str, float]:
+        """Build the feature dict for a ring-canonicalized SMILES"""
+        atoms, rings, bonds, hetero = self._counts_for_key(key)
+        return {
+            'atom_count': atoms,
+            'ring_count': rings,
+            'double_bonds': bonds,
+            'heteroatoms': hetero,
+            'complexity': self._complexity_from_counts(atoms, rings, bonds, hetero)
         }
-        return sum(features.values()) * 1.5
     
     def extract_features(self, smiles: str) -> Dict[str, float]:
         """Extract features from SMILES string"""
-        features = {}
-        for name, extractor in self.feature_extractors.items():
-            features[name] = extractor(smiles)
-        return features
+        return self._features_for_key(_canonicalize_ring_ids(smiles))
     
-    def predict_properties(self, smiles: str) -> Dict[str, Any]:
-        """Predict molecular properties"""
-        features = self.extract_features(smiles)
+    def _predict_for_keys(self, keys: List[str]) -> List[Tuple[PropertyPrediction, float]]:
+        """Compute property predictions and confidence for ring-canonicalized SMILES in one pass"""
+        n = len(keys)
+        counts = np.array([self._counts_for_key(key) for key in keys], dtype=np.float64).reshape(n, 4)
+        atoms, rings, bonds, hetero = counts.T
+        complexity = (atoms + rings + bonds + hetero) * 1.5
         
-        # Generate consistent pseudo-random values based on SMILES
-        seed = int(hashlib.md5(smiles.encode()).hexdigest()[:8], 16)
-        np.random.seed(seed)
+        # Generate consistent pseudo-random values based on SMILES; a private RandomState
+        # keeps the global NumPy RNG untouched so results are safe to cache
+        rng = self._thread_rng()
+        noise = np.empty((n, 5))
+        confidence_noise = np.empty(n)
+        toxicity = []
+        for i, key in enumerate(keys):
+            rng.seed(_seed_for(key))
+            noise[i] = rng.standard_normal(5)
+            toxicity.append(self._calculate_toxicity_risk(complexity[i], rng))
+            confidence_noise[i] = rng.standard_normal()
         
         # Simple property predictions based on features
-        predictions = {
-            'molecular_weight': features['atom_count'] * 12.5 + features['heteroatoms'] * 3 + np.random.normal(0, 10),
-            'logP': np.clip(features['ring_count'] * 0.5 - features['heteroatoms'] * 0.2 + np.random.normal(0, 0.5), -3, 7),
-            'solubility_log_mol_l': np.clip(-features['complexity'] * 0.1 + np.random.normal(-2, 0.5), -10, 2),
-            'bioavailability_score': np.clip(0.8 - features['complexity'] * 0.01 + np.random.normal(0, 0.1), 0, 1),
-            'synthetic_accessibility': np.clip(10 - features['complexity'] * 0.05, 1, 10),
-            'drug_likeness': self._calculate_drug_likeness(features),
-            'toxicity_risk': self._calculate_toxicity_risk(features)
-        }
+        columns = np.column_stack((
+            atoms * 12.5 + hetero * 3 + noise[:, 0] * 10,
+            np.clip(rings * 0.5 - hetero * 0.2 + noise[:, 1] * 0.5, -3, 7),
+            np.clip(-complexity * 0.1 + (noise[:, 2] * 0.5 - 2), -10, 2),
+            np.clip(0.8 - complexity * 0.01 + noise[:, 3] * 0.1, 0, 1),
+            np.clip(10 - complexity * 0.05, 1, 10),
+            self._calculate_drug_likeness(atoms, hetero, complexity, noise[:, 4])
+        ))
+        confidence = np.clip(0.7 + confidence_noise * 0.1, 0.5, 0.95)
         
+        return [
+            (PropertyPrediction(*row, toxicity_risk=risks), conf)
+            for row, risks, conf in zip(columns.tolist(), toxicity, confidence.tolist())
+        ]
+    
+    def _thread_rng(self) -> np.random.RandomState:
+        """RandomState owned by the calling thread, reseeded per SMILES by the caller"""
+        # Reseeding is far cheaper than constructing a RandomState on every call
+        rng = getattr(self._local, 'rng', None)
+        if rng is None:
+            rng = self._local.rng = np.random.RandomState()
+        return rng
+    
+    def _analog_rng(self) -> np.random.Generator:
+        """Unseeded generator owned by the calling thread, for analog generation"""
+        # Kept apart from _thread_rng, which predict_properties reseeds mid-generation
+        rng = getattr(self._local, 'analog_rng', None)
+        if rng is None:
+            rng = self._local.analog_rng = np.random.default_rng()
+        return rng
+    
+    def _prediction_for_key(self, key: str) -> Tuple[PropertyPrediction, float]:
+        """Cached property predictions and confidence for a ring-canonicalized SMILES"""
+        cached = self._cached_predictions.get(key)
+        if cached is None:
+            cached = self._predict_for_keys([key])[0]
+            if len(key) <= CACHE_MAX_KEY_LENGTH:
+                self._cached_predictions.put(key, cached)
+        return cached
+    
+    def _property_result(self, key: str, predictions: PropertyPrediction, confidence: float) -> Dict[str, Any]:
+        """Assemble the predict_properties result for a ring-canonicalized SMILES"""
         return {
-            'predictions': predictions,
-            'features': features,
-            'confidence': np.clip(0.7 + np.random.normal(0, 0.1), 0.5, 0.95),
+            # Copy the one mutable field so callers cannot alter a cached entry
+            'predictions': predictions._replace(toxicity_risk=dict(predictions.toxicity_risk)),
+            'features': self._features_for_key(key),
+            'confidence': confidence,
             'model_version': self.model_version
         }
     
-    def _calculate_drug_likeness(self, features: Dict[str, float]) -> float:
+    def predict_properties(self, smiles: str) -> Dict[str, Any]:
+        """Predict molecular properties"""
+        key = _canonicalize_ring_ids(smiles)
+        predictions, confidence = self._prediction_for_key(key)
+        return self._property_result(key, predictions, confidence)
+    
+    def predict_properties_batch(self, smiles_list: List[str]) -> List[Dict[str, Any]]:
+        """Predict molecular properties for many SMILES with vectorized feature math"""
+        keys = [_canonicalize_ring_ids(smiles) for smiles in smiles_list]
+        # Predict each distinct uncached molecule once, then fan results back out in input order;
+        # per-key seeding makes batch results identical to single predictions, so they share the cache
+        computed = {}
+        misses = []
+        for key in dict.fromkeys(keys):
+            cached = self._cached_predictions.get(key)
+            if cached is None:
+                misses.append(key)
+            else:
+                computed[key] = cached
+        if misses:
+            for key, prediction in zip(misses, self._predict_for_keys(misses)):
+                if len(key) <= CACHE_MAX_KEY_LENGTH:
+                    self._cached_predictions.put(key, prediction)
+                computed[key] = prediction
+        return [self._property_result(key, *computed[key]) for key in keys]
+    
+    def clear_cache(self):
+        """Drop cached feature counts and property predictions"""
+        self._cached_counts.cache_clear()
+        self._cached_predictions.clear()
+    
+    def _calculate_drug_likeness(self, atoms: np.ndarray, hetero: np.ndarray,
+                                 complexity: np.ndarray, noise: np.ndarray) -> np.ndarray:
         """Calculate Lipinski's Rule of Five compliance"""
-        score = 1.0
+        score = np.ones_like(atoms)
         
         # Approximate checks based on features
-        if features['atom_count'] > 35:  # MW > ~500
-            score -= 0.25
-        if features['heteroatoms'] < 5:  # Low H-bond acceptors/donors
-            score -= 0.25
-        if features['complexity'] > 100:
-            score -= 0.25
-            
-        return np.clip(score + np.random.normal(0, 0.05), 0, 1)
+        score -= 0.25 * (atoms > 35)  # MW > ~500
+        score -= 0.25 * (hetero < 5)  # Low H-bond acceptors/donors
+        score -= 0.25 * (complexity > 100)
+        
+        return np.clip(score + noise * 0.05, 0, 1)
     
-    def _calculate_toxicity_risk(self, features: Dict[str, float]) -> Dict[str, str]:
+    def _calculate_toxicity_risk(self, complexity: float, rng: np.random.RandomState) -> Dict[str, str]:
         """Predict toxicity risks"""
-        complexity = features['complexity']
-        
         # Simple risk assessment based on complexity
         risks = {}
-        risk_categories = ['mutagenicity', 'tumorigenicity', 'irritant', 'reproductive']
         
-        for category in risk_categories:
+        for category in _RISK_CATEGORIES:
             if complexity < 30:
-                risk = 'low'
+                risk = _RISK_LOW
             elif complexity < 60:
-                risk = 'medium' if np.random.random() > 0.5 else 'low'
+                risk = _RISK_MEDIUM if rng.random_sample() > 0.5 else _RISK_LOW
             else:
-                risk = 'high' if np.random.random() > 0.7 else 'medium'
+                risk = _RISK_HIGH if rng.random_sample() > 0.7 else _RISK_MEDIUM
             risks[category] = risk
             
         return risks
     
-    def predict_activity(self, smiles: str, target: str) -> Dict[str, Any]:
+    def predict_activity(self, smiles: str, target: str) -> ActivityPrediction:
         """Predict activity against a specific target"""
-        features = self.extract_features(smiles)
+        key = _canonicalize_ring_ids(smiles)
+        features = self._features_for_key(key)
         
-        # Generate consistent activity based on target and SMILES
-        seed = int(hashlib.md5(f"{smiles}{target}".encode()).hexdigest()[:8], 16)
-        np.random.seed(seed)
+        # Generate consistent activity based on target and SMILES; the thread's own RandomState
+        # keeps concurrent requests from interleaving between the seed and the draws
+        rng = self._thread_rng()
+        rng.seed(_seed_for(f"{key}{target}"))
         
         # Simple activity prediction
-        base_activity = 6.0 + np.random.normal(0, 1.5)
+        base_activity = 6.0 + rng.normal(0, 1.5)
         activity_modifier = features['complexity'] * 0.01
         
         pIC50 = np.clip(base_activity - activity_modifier, 3, 9)
         
-        return {
-            'target': target,
-            'pIC50': round(pIC50, 2),
-            'IC50_nM': round(10 ** (9 - pIC50), 2),
-            'activity_class': 'active' if pIC50 > 6 else 'moderately_active' if pIC50 > 5 else 'inactive',
-            'confidence': np.clip(0.65 + np.random.normal(0, 0.1), 0.4, 0.9)
-        }
+        return ActivityPrediction(
+            target=target,
+            pIC50=round(pIC50, 2),
+            IC50_nM=round(10 ** (9 - pIC50), 2),
+            activity_class='active' if pIC50 > 6 else 'moderately_active' if pIC50 > 5 else 'inactive',
+            confidence=np.clip(0.65 + rng.normal(0, 0.1), 0.4, 0.9)
+        )
     
     def generate_analogs(self, smiles: str, n_analogs: int = 5) -> List[Dict[str, Any]]:
         """Generate similar molecular structures"""
         analogs = []
-        
-        # Simple modifications to generate analogs
-        modifications = [
-            ('F', 'Cl'),
-            ('Cl', 'Br'),
-            ('O', 'S'),
-            ('N', 'O'),
-            ('C', 'N'),
-            ('=', ''),
-            ('C', 'CC'),
-            (')', ')C')
-        ]
+        modifications = _ANALOG_MODIFICATIONS
+        rng = self._analog_rng()
         
         for i in range(n_analogs):
             analog_smiles = smiles
-            n_mods = np.random.randint(1, 3)
+            n_mods = rng.integers(1, 3)
             
             for _ in range(n_mods):
-                if np.random.random() > 0.5 and modifications:
-                    old, new = random.choice(modifications)
-                    if old in analog_smiles:
-                        analog_smiles = analog_smiles.replace(old, new, 1)
+                if rng.random() > 0.5 and modifications:
+                    old, new = modifications[rng.integers(len(modifications))]
+                    # One scan locates the first site; splice instead of `in` + replace
+                    idx = analog_smiles.find(old)
+                    if idx >= 0:
+                        analog_smiles = analog_smiles[:idx] + new + analog_smiles[idx + len(old):]
             
             if analog_smiles != smiles:
                 props = self.predict_properties(analog_smiles)
                 analogs.append({
                     'smiles': analog_smiles,
-                    'similarity': np.clip(0.7 + np.random.normal(0, 0.1), 0.5, 0.95),
-                    'properties': props['predictions']
+                    'similarity': np.clip(0.7 + rng.normal(0, 0.1), 0.5, 0.95),
+                    'properties': props['predictions']._asdict()
                 })
         
         return analogs
@@ -7,11 +7,51 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models.simple_predictor import predictor
-from typing import Dict, Any, List
+from models.simple_predictor import predictor, CACHE_MAX_KEY_LENGTH
+from typing import Dict, Any, List, Optional, Callable
+from functools import lru_cache
 import json
+import string
 import numpy as np
 
+if hasattr(int, 'bit_count'):
+    _popcount = int.bit_count
+else:  # Python < 3.10
+    def _popcount(mask: int) -> int:
+        return bin(mask).count('1')
+
+def _char_fingerprint(smiles: str) -> int:
+    """Character-set fingerprint of a SMILES string as an ASCII bitmask"""
+    mask = 0
+    for byte in set(smiles.encode()):
+        mask |= 1 << byte
+    return mask
+
+_cached_char_fingerprint = lru_cache(maxsize=65536)(_char_fingerprint)
+
+def _fingerprint(smiles: str) -> int:
+    """Character-set fingerprint, cached for all but very long SMILES"""
+    if len(smiles) > CACHE_MAX_KEY_LENGTH:
+        return _char_fingerprint(smiles)
+    return _cached_char_fingerprint(smiles)
+
+# Characters that may appear in a SMILES string
+_SMILES_CHARS = frozenset(string.ascii_letters + string.digits + '()[]=#$:/\\%@+-.*')
+
+# Generator-based RNG for ADMET noise. Created lazily per process: with Gunicorn's
+# preload, an RNG built at import would be forked into every worker with identical state
+_rng: Optional[np.random.Generator] = None
+_rng_pid: Optional[int] = None
+
+def _get_rng() -> np.random.Generator:
+    """Return this process's ADMET noise generator, creating it on first use"""
+    global _rng, _rng_pid
+    pid = os.getpid()
+    if _rng_pid != pid:
+        _rng = np.random.default_rng()
+        _rng_pid = pid
+    return _rng
+
 class MLService:
     """Main ML service class"""
     
@@ -44,15 +84,53 @@ class MLService:
             }
         }
     
+    def _validate_smiles(self, smiles: str) -> Optional[str]:
+        """Return an error message for malformed SMILES, or None if it looks usable"""
+        # Cheap syntactic checks so invalid input is rejected without raising
+        if not isinstance(smiles, str) or not smiles:
+            return 'invalid SMILES'
+        if not _SMILES_CHARS.issuperset(smiles):
+            return 'invalid SMILES'
+        if smiles.count('(') != smiles.count(')') or smiles.count('[') != smiles.count(']'):
+            return 'invalid SMILES'
+        return None
+    
+    def _run_batch(self, smiles_list: List[str],
+                   batch_fn: Callable[[List[str]], List[Dict[str, Any]]],
+                   single_fn: Callable[[str], Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run batch_fn over the valid SMILES and report invalid ones without calling the model"""
+        errors = [self._validate_smiles(smiles) for smiles in smiles_list]
+        valid = [smiles for smiles, error in zip(smiles_list, errors) if error is None]
+        try:
+            predicted = iter(batch_fn(valid))
+        except Exception:
+            # Fall back to one call per molecule so individual failures are reported
+            predicted = map(single_fn, valid)
+        return [
+            next(predicted) if error is None else {'success': False, 'error': error, 'smiles': smiles}
+            for smiles, error in zip(smiles_list, errors)
+        ]
+    
+    def _properties_response(self, smiles: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Wrap a predictor result as a successful API response"""
+        return {
+            'success': True,
+            'smiles': smiles,
+            **result,
+            'predictions': result['predictions']._asdict()
+        }
+    
     def predict_properties(self, smiles: str) -> Dict[str, Any]:
         """Predict molecular properties"""
-        try:
-            result = self.predictor.predict_properties(smiles)
+        error = self._validate_smiles(smiles)
+        if error:
             return {
-                'success': True,
-                'smiles': smiles,
-                **result
+                'success': False,
+                'error': error,
+                'smiles': smiles
             }
+        try:
+            return self._properties_response(smiles, self.predictor.predict_properties(smiles))
         except Exception as e:
             return {
                 'success': False,
@@ -62,12 +140,20 @@ class MLService:
     
     def predict_activity(self, smiles: str, target: str) -> Dict[str, Any]:
         """Predict activity against target"""
+        error = self._validate_smiles(smiles)
+        if error:
+            return {
+                'success': False,
+                'error': error,
+                'smiles': smiles,
+                'target': target
+            }
         try:
             result = self.predictor.predict_activity(smiles, target)
             return {
                 'success': True,
                 'smiles': smiles,
-                **result
+                **result._asdict()
             }
         except Exception as e:
             return {
@@ -79,6 +165,13 @@ class MLService:
     
     def generate_analogs(self, smiles: str, n_analogs: int = 5) -> Dict[str, Any]:
         """Generate molecular analogs"""
+        error = self._validate_smiles(smiles)
+        if error:
+            return {
+                'success': False,
+                'error': error,
+                'parent_smiles': smiles
+            }
         try:
             analogs = self.predictor.generate_analogs(smiles, n_analogs)
             return {
@@ -96,31 +189,63 @@ class MLService:
     
     def calculate_similarity(self, smiles1: str, smiles2: str) -> Dict[str, Any]:
         """Calculate molecular similarity"""
-        try:
-            # Simple similarity based on common substrings
-            set1 = set(smiles1)
-            set2 = set(smiles2)
-            jaccard = len(set1.intersection(set2)) / len(set1.union(set2))
-            
+        error = self._validate_smiles(smiles1) or self._validate_smiles(smiles2)
+        if error:
             return {
-                'success': True,
-                'smiles1': smiles1,
-                'smiles2': smiles2,
-                'similarity': round(jaccard, 3),
-                'method': 'jaccard'
+                'success': False,
+                'error': error
             }
-        except Exception as e:
+        
+        # Simple similarity based on common substrings; both sets are non-empty once validated
+        fp1 = _fingerprint(smiles1)
+        fp2 = _fingerprint(smiles2)
+        jaccard = _popcount(fp1 & fp2) / _popcount(fp1 | fp2)
+        
+        return {
+            'success': True,
+            'smiles1': smiles1,
+            'smiles2': smiles2,
+            'similarity': round(jaccard, 3),
+            'method': 'jaccard'
+        }
+    
+    def calculate_similarity_batch(self, reference: str, candidates: List[str]) -> Dict[str, Any]:
+        """Calculate similarity of every candidate to one reference molecule"""
+        error = self._validate_smiles(reference)
+        if error:
             return {
                 'success': False,
-                'error': str(e)
+                'error': error
             }
+        
+        # Fingerprint the reference once; invalid candidates are skipped
+        ref = _fingerprint(reference)
+        similarities = []
+        for candidate in candidates:
+            if self._validate_smiles(candidate) is None:
+                fp = _fingerprint(candidate)
+                similarities.append({
+                    'smiles': candidate,
+                    'similarity': round(_popcount(ref & fp) / _popcount(ref | fp), 3)
+                })
+        
+        return {
+            'success': True,
+            'reference': reference,
+            'similarities': similarities,
+            'method': 'jaccard'
+        }
     
     def batch_predict(self, smiles_list: List[str]) -> Dict[str, Any]:
         """Batch prediction for multiple molecules"""
-        results = []
-        for smiles in smiles_list:
-            result = self.predict_properties(smiles)
-            results.append(result)
+        results = self._run_batch(
+            smiles_list,
+            lambda valid: [
+                self._properties_response(smiles, result)
+                for smiles, result in zip(valid, self.predictor.predict_properties_batch(valid))
+            ],
+            self.predict_properties
+        )
         
         return {
             'success': True,
@@ -153,49 +278,90 @@ class MLService:
                 ]
             }
     
-    def predict_admet(self, smiles: str) -> Dict[str, Any]:
-        """Predict ADMET properties"""
-        try:
-            props = self.predictor.predict_properties(smiles)
-            features = props['features']
-            
-            # Simple ADMET predictions
-            admet = {
-                'absorption': {
-                    'human_intestinal_absorption': 'high' if features['complexity'] < 50 else 'medium',
-                    'caco2_permeability': round(-4.5 + features['atom_count'] * 0.01, 2),
-                    'pgp_substrate': 'no' if features['complexity'] < 40 else 'yes'
-                },
-                'distribution': {
-                    'vd_human': round(0.5 + features['atom_count'] * 0.02, 2),
-                    'bbb_permeant': 'yes' if props['predictions']['logP'] > 2 else 'no',
-                    'plasma_protein_binding': round(70 + features['heteroatoms'] * 2, 1)
-                },
-                'metabolism': {
-                    'cyp2d6_substrate': 'no' if features['complexity'] < 45 else 'yes',
-                    'cyp3a4_substrate': 'yes' if features['complexity'] > 30 else 'no',
-                    'cyp_inhibition': 'low' if features['complexity'] < 50 else 'medium'
-                },
-                'excretion': {
-                    'total_clearance': round(0.5 + np.random.normal(0, 0.2), 2),
-                    'renal_clearance': round(0.2 + np.random.normal(0, 0.1), 2),
-                    'half_life': round(2 + features['complexity'] * 0.1, 1)
+    def _admet_results(self, smiles_list: List[str], props: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Compute ADMET responses from property predictions with vectorized field math"""
+        n = len(props)
+        features = np.array(
+            [(p['features']['atom_count'], p['features']['heteroatoms'], p['features']['complexity'])
+             for p in props],
+            dtype=np.float64
+        ).reshape(n, 3)
+        atoms, hetero, complexity = features.T
+        logp = [p['predictions'].logP for p in props]
+        
+        # Simple ADMET predictions; numeric fields are computed as whole columns
+        caco2 = np.round(-4.5 + atoms * 0.01, 2).tolist()
+        vd = np.round(0.5 + atoms * 0.02, 2).tolist()
+        ppb = (70 + hetero * 2).astype(np.int64).tolist()  # integral, as heteroatom counts are
+        rng = _get_rng()
+        total_clearance = np.round(0.5 + rng.normal(0, 0.2, n), 2).tolist()
+        renal_clearance = np.round(0.2 + rng.normal(0, 0.1, n), 2).tolist()
+        half_life = np.round(2 + complexity * 0.1, 1).tolist()
+        cx = complexity.tolist()
+        
+        return [
+            {
+                'success': True,
+                'smiles': smiles,
+                'admet': {
+                    'absorption': {
+                        'human_intestinal_absorption': 'high' if cx[i] < 50 else 'medium',
+                        'caco2_permeability': caco2[i],
+                        'pgp_substrate': 'no' if cx[i] < 40 else 'yes'
+                    },
+                    'distribution': {
+                        'vd_human': vd[i],
+                        'bbb_permeant': 'yes' if logp[i] > 2 else 'no',
+                        'plasma_protein_binding': ppb[i]
+                    },
+                    'metabolism': {
+                        'cyp2d6_substrate': 'no' if cx[i] < 45 else 'yes',
+                        'cyp3a4_substrate': 'yes' if cx[i] > 30 else 'no',
+                        'cyp_inhibition': 'low' if cx[i] < 50 else 'medium'
+                    },
+                    'excretion': {
+                        'total_clearance': total_clearance[i],
+                        'renal_clearance': renal_clearance[i],
+                        'half_life': half_life[i]
+                    },
+                    'toxicity': props[i]['predictions'].toxicity_risk
                 },
-                'toxicity': props['predictions']['toxicity_risk']
+                'confidence': props[i]['confidence']
             }
-            
+            for i, smiles in enumerate(smiles_list)
+        ]
+    
+    def predict_admet(self, smiles: str) -> Dict[str, Any]:
+        """Predict ADMET properties"""
+        error = self._validate_smiles(smiles)
+        if error:
             return {
-                'success': True,
-                'smiles': smiles,
-                'admet': admet,
-                'confidence': props['confidence']
+                'success': False,
+                'error': error,
+                'smiles': smiles
             }
+        try:
+            return self._admet_results([smiles], [self.predictor.predict_properties(smiles)])[0]
         except Exception as e:
             return {
                 'success': False,
                 'error': str(e),
                 'smiles': smiles
             }
+    
+    def predict_admet_batch(self, smiles_list: List[str]) -> Dict[str, Any]:
+        """Batch ADMET prediction for multiple molecules"""
+        results = self._run_batch(
+            smiles_list,
+            lambda valid: self._admet_results(valid, self.predictor.predict_properties_batch(valid)),
+            self.predict_admet
+        )
+        
+        return {
+            'success': True,
+            'count': len(results),
+            'results': results
+        }
 
 # Create service instance
 ml_service = MLService()
\ No newline at end of file
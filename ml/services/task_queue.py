@@ -0,0 +1,47 @@
+"""
+Background task queue for PharmOS long-running jobs
+Agent runs and model training are enqueued by the API and executed by arq workers
+The job bodies are placeholders that carry over the API's TODOs until the agents are implemented
+"""
+
+import os
+from typing import Dict, Any
+from arq.connections import RedisSettings
+
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379')
+REDIS_SETTINGS = RedisSettings.from_dsn(REDIS_URL)
+
+# Results stay available to the status endpoint for a day
+RESULT_TTL_SECONDS = 86400
+
+async def run_research_agent(ctx: Dict[str, Any], task: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the research agent for literature analysis"""
+    # TODO: Implement research agent
+    return {'message': 'Research agent - implementation pending'}
+
+async def run_molecule_agent(ctx: Dict[str, Any], task: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the molecule design agent"""
+    # TODO: Implement molecule agent
+    return {'message': 'Molecule agent - implementation pending'}
+
+async def run_clinical_agent(ctx: Dict[str, Any], task: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the clinical trials agent"""
+    # TODO: Implement clinical agent
+    return {'message': 'Clinical agent - implementation pending'}
+
+async def run_safety_agent(ctx: Dict[str, Any], task: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the safety monitoring agent"""
+    # TODO: Implement safety agent
+    return {'message': 'Safety agent - implementation pending'}
+
+async def train_model(ctx: Dict[str, Any], model_name: str, dataset: str,
+                      hyperparameters: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Train a model on a dataset"""
+    # TODO: Implement model training pipeline
+    return {'message': 'Model training - implementation pending'}
+
+class WorkerSettings:
+    """arq worker configuration; run `arq services.task_queue.WorkerSettings` from the ml directory"""
+    functions = [run_research_agent, run_molecule_agent, run_clinical_agent, run_safety_agent, train_model]
+    redis_settings = REDIS_SETTINGS
+    keep_result = RESULT_TTL_SECONDS
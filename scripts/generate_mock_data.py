@@ -4,13 +4,18 @@ Generate mock data for PharmOS platform
 Creates realistic fake data for development and testing
 """
 
-import json
+import gzip
 import random
 import string
-from datetime import datetime, timedelta
+import sys
+from datetime import datetime
+from functools import lru_cache
 import os
 from pathlib import Path
 
+import numpy as np
+import orjson
+
 # Mock molecule SMILES strings
 MOCK_MOLECULES = [
     {"smiles": "CC(C)Cc1ccc(cc1)C(C)C(=O)O", "name": "Ibuprofen"},
@@ -110,110 +115,164 @@ MOCK_TRIALS = [
 ]
 
 # Mock adverse events
-ADVERSE_EVENTS = [
+ADVERSE_EVENTS = (
     "Headache", "Nausea", "Dizziness", "Fatigue", "Insomnia",
     "Dry mouth", "Constipation", "Diarrhea", "Rash", "Pruritus",
     "Hypertension", "Hypotension", "Tachycardia", "Bradycardia",
     "Elevated liver enzymes", "Muscle pain", "Joint pain"
-]
+)
+ADVERSE_EVENTS_LOWER = {event: event.lower() for event in ADVERSE_EVENTS}
+
+# Choices for safety events and research insights
+SAFETY_DRUGS = ("PharmOS-001", "AIM-247", "CardioShield", "NeuroProtect", "MetaboFix")
+SEVERITIES = ("Mild", "Moderate", "Severe")
+GENDERS = ("M", "F")
+OUTCOMES = ("Resolved", "Ongoing", "Resolved with sequelae")
+RESEARCH_TOPICS = ("Cardiovascular", "Oncology", "Neurology", "Immunology", "Metabolic")
+
+# Characters used for generated IDs
+ID_ALPHABET = string.ascii_uppercase + string.digits
+
+# Generators owned by this module instead of the shared global random state;
+# rng draws whole columns of random fields at once
+rand = random.Random()
+rng = np.random.default_rng()
 
 def generate_random_id(prefix="", length=8):
     """Generate a random ID"""
-    return prefix + ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
+    return prefix + ''.join(rand.choices(ID_ALPHABET, k=length))
 
 def generate_mock_predictions():
     """Generate mock ML predictions"""
-    predictions = []
-    for mol in MOCK_MOLECULES[:5]:
-        predictions.append({
+    molecules = MOCK_MOLECULES[:5]
+    n = len(molecules)
+    
+    # Draw each numeric field for every molecule in one call
+    toxicity = np.round(rng.uniform(0.1, 0.9, n), 3).tolist()
+    bioavailability = np.round(rng.uniform(0.3, 0.95, n), 3).tolist()
+    half_life = np.round(rng.uniform(2, 24, n), 1).tolist()
+    logp = np.round(rng.uniform(-2, 5, n), 2).tolist()
+    solubility = np.round(rng.uniform(0.01, 100, n), 2).tolist()
+    binding = np.round(rng.uniform(0.1, 1000, n), 1).tolist()
+    confidence = np.round(rng.uniform(0.7, 0.95, n), 2).tolist()
+    
+    return [
+        {
             "molecule_id": generate_random_id("MOL-"),
             "smiles": mol["smiles"],
             "name": mol["name"],
             "predictions": {
-                "toxicity_score": round(random.uniform(0.1, 0.9), 3),
-                "bioavailability": round(random.uniform(0.3, 0.95), 3),
-                "half_life_hours": round(random.uniform(2, 24), 1),
-                "logP": round(random.uniform(-2, 5), 2),
-                "solubility_mg_ml": round(random.uniform(0.01, 100), 2),
-                "binding_affinity_nm": round(random.uniform(0.1, 1000), 1)
+                "toxicity_score": tox,
+                "bioavailability": bio,
+                "half_life_hours": hl,
+                "logP": lp,
+                "solubility_mg_ml": sol,
+                "binding_affinity_nm": bind
             },
-            "confidence": round(random.uniform(0.7, 0.95), 2),
+            "confidence": conf,
             "timestamp": datetime.now().isoformat()
-        })
-    return predictions
+        }
+        for mol, tox, bio, hl, lp, sol, bind, conf in zip(
+            molecules, toxicity, bioavailability, half_life, logp, solubility, binding, confidence
+        )
+    ]
 
 def generate_safety_events():
     """Generate mock safety events"""
-    events = []
-    drugs = ["PharmOS-001", "AIM-247", "CardioShield", "NeuroProtect", "MetaboFix"]
+    n = 20
+    
+    # Draw each field for every event in one call
+    reported = np.datetime64(datetime.now().date()) - rng.integers(1, 91, n).astype("timedelta64[D]")
+    reported_dates = np.datetime_as_string(reported, unit="D").tolist()
+    drug_names = rng.choice(SAFETY_DRUGS, n).tolist()
+    event_types = rng.choice(ADVERSE_EVENTS, n).tolist()
+    severities = rng.choice(SEVERITIES, n).tolist()
+    ages = rng.integers(25, 76, n).tolist()
+    genders = rng.choice(GENDERS, n).tolist()
+    outcomes = rng.choice(OUTCOMES, n).tolist()
+    treatment_days = rng.integers(1, 31, n).tolist()
     
-    for i in range(20):
-        event_date = datetime.now() - timedelta(days=random.randint(1, 90))
-        events.append({
+    return [
+        {
             "event_id": generate_random_id("EVT-"),
-            "drug_name": random.choice(drugs),
-            "event_type": random.choice(ADVERSE_EVENTS),
-            "severity": random.choice(["Mild", "Moderate", "Severe"]),
-            "patient_age": random.randint(25, 75),
-            "gender": random.choice(["M", "F"]),
-            "outcome": random.choice(["Resolved", "Ongoing", "Resolved with sequelae"]),
-            "reported_date": event_date.strftime("%Y-%m-%d"),
-            "description": f"Patient experienced {random.choice(ADVERSE_EVENTS).lower()} after {random.randint(1, 30)} days of treatment"
-        })
-    return events
+            "drug_name": drug,
+            "event_type": event,
+            "severity": severity,
+            "patient_age": age,
+            "gender": gender,
+            "outcome": outcome,
+            "reported_date": reported_date,
+            "description": f"Patient experienced {ADVERSE_EVENTS_LOWER[event]} after {days} days of treatment"
+        }
+        for drug, event, severity, age, gender, outcome, reported_date, days in zip(
+            drug_names, event_types, severities, ages, genders, outcomes, reported_dates, treatment_days
+        )
+    ]
 
 def generate_research_insights():
     """Generate mock research insights"""
-    insights = []
-    topics = ["Cardiovascular", "Oncology", "Neurology", "Immunology", "Metabolic"]
-    
-    for topic in topics:
-        insights.append({
+    return [
+        {
             "insight_id": generate_random_id("INS-"),
             "topic": topic,
             "summary": f"Recent advances in {topic} research show promising therapeutic targets",
             "key_findings": [
                 f"Discovery of novel {topic.lower()} biomarkers",
-                f"AI models predict {random.randint(70, 95)}% success rate",
-                f"{random.randint(3, 10)} new drug candidates identified"
+                f"AI models predict {rand.randint(70, 95)}% success rate",
+                f"{rand.randint(3, 10)} new drug candidates identified"
             ],
-            "papers_analyzed": random.randint(50, 200),
-            "confidence_score": round(random.uniform(0.75, 0.95), 2),
+            "papers_analyzed": rand.randint(50, 200),
+            "confidence_score": round(rand.uniform(0.75, 0.95), 2),
             "generated_date": datetime.now().isoformat()
-        })
-    return insights
+        }
+        for topic in RESEARCH_TOPICS
+    ]
+
+# Datasets that never change between runs, keyed by output file name
+STATIC_DATASETS = {
+    "molecules.json": MOCK_MOLECULES,
+    "research_papers.json": MOCK_PAPERS,
+    "clinical_trials.json": MOCK_TRIALS
+}
+
+def encode_json(data, compress=False):
+    """Serialize data to JSON bytes, indented unless it is headed for a compressed file"""
+    # Machine-readable seed data skips indentation
+    return orjson.dumps(data) if compress else orjson.dumps(data, option=orjson.OPT_INDENT_2)
+
+@lru_cache(maxsize=None)
+def encode_static(name, compress=False):
+    """Encode a static dataset once and reuse the bytes on later saves"""
+    return encode_json(STATIC_DATASETS[name], compress)
 
-def save_mock_data():
+def write_json(path, payload, compress=False):
+    """Write encoded JSON with a single write, gzipped to .json.gz when compressing"""
+    if compress:
+        with gzip.open(path.with_name(path.name + ".gz"), "wb", compresslevel=1) as f:
+            f.write(payload)
+    else:
+        path.write_bytes(payload)
+
+def save_mock_data(compress=False):
     """Save all mock data to files"""
     data_dir = Path("/mnt/d/PharmOS/data/mock")
     data_dir.mkdir(parents=True, exist_ok=True)
     
-    # Save molecules
-    with open(data_dir / "molecules.json", "w") as f:
-        json.dump(MOCK_MOLECULES, f, indent=2)
-    
-    # Save research papers
-    with open(data_dir / "research_papers.json", "w") as f:
-        json.dump(MOCK_PAPERS, f, indent=2)
-    
-    # Save clinical trials
-    with open(data_dir / "clinical_trials.json", "w") as f:
-        json.dump(MOCK_TRIALS, f, indent=2)
+    # Save molecules, research papers and clinical trials
+    for name in STATIC_DATASETS:
+        write_json(data_dir / name, encode_static(name, compress), compress)
     
     # Save ML predictions
     predictions = generate_mock_predictions()
-    with open(data_dir / "ml_predictions.json", "w") as f:
-        json.dump(predictions, f, indent=2)
+    write_json(data_dir / "ml_predictions.json", encode_json(predictions, compress), compress)
     
     # Save safety events
     events = generate_safety_events()
-    with open(data_dir / "safety_events.json", "w") as f:
-        json.dump(events, f, indent=2)
+    write_json(data_dir / "safety_events.json", encode_json(events, compress), compress)
     
     # Save research insights
     insights = generate_research_insights()
-    with open(data_dir / "research_insights.json", "w") as f:
-        json.dump(insights, f, indent=2)
+    write_json(data_dir / "research_insights.json", encode_json(insights, compress), compress)
     
     print(f"Mock data generated successfully in {data_dir}")
     print(f"- {len(MOCK_MOLECULES)} molecules")
@@ -224,4 +283,4 @@ def save_mock_data():
     print(f"- {len(insights)} research insights")
 
 if __name__ == "__main__":
-    save_mock_data()
\ No newline at end of file
+    save_mock_data(compress="--compress" in sys.argv[1:])
\ No newline at end of file
@@ -7,6 +7,7 @@ Creates necessary tables, indexes, and seed data
 import os
 import sys
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 import psycopg2
@@ -26,126 +27,125 @@ POSTGRES_URL = os.getenv('POSTGRES_URL', 'postgresql://pharmos_user:pharmos_pass
 MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/pharmos')
 REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379')
 
+# Engine shared by schema and seed steps, created on first use
+_engine = None
+
+def get_engine():
+    """Return the shared PostgreSQL engine, keeping one connection for every step"""
+    global _engine
+    if _engine is None:
+        _engine = create_engine(POSTGRES_URL, pool_size=1, max_overflow=0)
+    return _engine
+
+# Schema DDL, sent to PostgreSQL as a single batch
+POSTGRES_SCHEMA = """
+-- Users table
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    email VARCHAR(255) UNIQUE NOT NULL,
+    username VARCHAR(100) UNIQUE NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    full_name VARCHAR(255),
+    role VARCHAR(50) DEFAULT 'user',
+    is_active BOOLEAN DEFAULT true,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Organizations table
+CREATE TABLE IF NOT EXISTS organizations (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    type VARCHAR(100),
+    license_type VARCHAR(50),
+    is_active BOOLEAN DEFAULT true,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Projects table
+CREATE TABLE IF NOT EXISTS projects (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    description TEXT,
+    organization_id INTEGER REFERENCES organizations(id),
+    owner_id INTEGER REFERENCES users(id),
+    status VARCHAR(50) DEFAULT 'active',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Molecules table
+CREATE TABLE IF NOT EXISTS molecules (
+    id SERIAL PRIMARY KEY,
+    smiles VARCHAR(1000) NOT NULL,
+    inchi VARCHAR(2000),
+    name VARCHAR(255),
+    molecular_weight FLOAT,
+    logp FLOAT,
+    project_id INTEGER REFERENCES projects(id),
+    created_by INTEGER REFERENCES users(id),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Clinical trials table
+CREATE TABLE IF NOT EXISTS clinical_trials (
+    id SERIAL PRIMARY KEY,
+    trial_id VARCHAR(100) UNIQUE NOT NULL,
+    title TEXT NOT NULL,
+    phase VARCHAR(20),
+    status VARCHAR(50),
+    condition TEXT,
+    intervention TEXT,
+    sponsor VARCHAR(255),
+    start_date DATE,
+    completion_date DATE,
+    project_id INTEGER REFERENCES projects(id),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Safety events table
+CREATE TABLE IF NOT EXISTS safety_events (
+    id SERIAL PRIMARY KEY,
+    event_id VARCHAR(100) UNIQUE NOT NULL,
+    drug_name VARCHAR(255),
+    event_type VARCHAR(100),
+    severity VARCHAR(50),
+    description TEXT,
+    reported_by INTEGER REFERENCES users(id),
+    project_id INTEGER REFERENCES projects(id),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- API keys table
+CREATE TABLE IF NOT EXISTS api_keys (
+    id SERIAL PRIMARY KEY,
+    key_hash VARCHAR(255) UNIQUE NOT NULL,
+    user_id INTEGER REFERENCES users(id),
+    name VARCHAR(100),
+    permissions JSONB,
+    last_used TIMESTAMP,
+    expires_at TIMESTAMP,
+    is_active BOOLEAN DEFAULT true,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Indexes
+CREATE INDEX IF NOT EXISTS idx_molecules_smiles ON molecules(smiles);
+CREATE INDEX IF NOT EXISTS idx_molecules_project ON molecules(project_id);
+CREATE INDEX IF NOT EXISTS idx_trials_status ON clinical_trials(status);
+CREATE INDEX IF NOT EXISTS idx_safety_events_drug ON safety_events(drug_name);
+"""
+
 def init_postgres():
     """Initialize PostgreSQL database schema"""
     logger.info("Initializing PostgreSQL database...")
     
     try:
-        engine = create_engine(POSTGRES_URL)
+        engine = get_engine()
         
-        # Create tables
-        with engine.connect() as conn:
-            # Users table
-            conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id SERIAL PRIMARY KEY,
-                    email VARCHAR(255) UNIQUE NOT NULL,
-                    username VARCHAR(100) UNIQUE NOT NULL,
-                    password_hash VARCHAR(255) NOT NULL,
-                    full_name VARCHAR(255),
-                    role VARCHAR(50) DEFAULT 'user',
-                    is_active BOOLEAN DEFAULT true,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-            """))
-            
-            # Organizations table
-            conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS organizations (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(255) NOT NULL,
-                    type VARCHAR(100),
-                    license_type VARCHAR(50),
-                    is_active BOOLEAN DEFAULT true,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-            """))
-            
-            # Projects table
-            conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS projects (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(255) NOT NULL,
-                    description TEXT,
-                    organization_id INTEGER REFERENCES organizations(id),
-                    owner_id INTEGER REFERENCES users(id),
-                    status VARCHAR(50) DEFAULT 'active',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-            """))
-            
-            # Molecules table
-            conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS molecules (
-                    id SERIAL PRIMARY KEY,
-                    smiles VARCHAR(1000) NOT NULL,
-                    inchi VARCHAR(2000),
-                    name VARCHAR(255),
-                    molecular_weight FLOAT,
-                    logp FLOAT,
-                    project_id INTEGER REFERENCES projects(id),
-                    created_by INTEGER REFERENCES users(id),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-            """))
-            
-            # Clinical trials table
-            conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS clinical_trials (
-                    id SERIAL PRIMARY KEY,
-                    trial_id VARCHAR(100) UNIQUE NOT NULL,
-                    title TEXT NOT NULL,
-                    phase VARCHAR(20),
-                    status VARCHAR(50),
-                    condition TEXT,
-                    intervention TEXT,
-                    sponsor VARCHAR(255),
-                    start_date DATE,
-                    completion_date DATE,
-                    project_id INTEGER REFERENCES projects(id),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-            """))
-            
-            # Safety events table
-            conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS safety_events (
-                    id SERIAL PRIMARY KEY,
-                    event_id VARCHAR(100) UNIQUE NOT NULL,
-                    drug_name VARCHAR(255),
-                    event_type VARCHAR(100),
-                    severity VARCHAR(50),
-                    description TEXT,
-                    reported_by INTEGER REFERENCES users(id),
-                    project_id INTEGER REFERENCES projects(id),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-            """))
-            
-            # API keys table
-            conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS api_keys (
-                    id SERIAL PRIMARY KEY,
-                    key_hash VARCHAR(255) UNIQUE NOT NULL,
-                    user_id INTEGER REFERENCES users(id),
-                    name VARCHAR(100),
-                    permissions JSONB,
-                    last_used TIMESTAMP,
-                    expires_at TIMESTAMP,
-                    is_active BOOLEAN DEFAULT true,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-            """))
-            
-            # Create indexes
-            conn.execute(text("CREATE INDEX IF NOT EXISTS idx_molecules_smiles ON molecules(smiles);"))
-            conn.execute(text("CREATE INDEX IF NOT EXISTS idx_molecules_project ON molecules(project_id);"))
-            conn.execute(text("CREATE INDEX IF NOT EXISTS idx_trials_status ON clinical_trials(status);"))
-            conn.execute(text("CREATE INDEX IF NOT EXISTS idx_safety_events_drug ON safety_events(drug_name);"))
-            
-            conn.commit()
+        # Create tables and indexes in one round-trip and one transaction
+        with engine.begin() as conn:
+            conn.exec_driver_sql(POSTGRES_SCHEMA)
             
         logger.info("PostgreSQL initialization completed successfully")
         
@@ -207,9 +207,9 @@ def init_redis():
             'queue:priority:safety': '20'
         }
         
-        for key, value in default_configs.items():
-            r.set(f'config:{key}', value)
-            
+        # Write every key in a single MSET round-trip
+        r.mset({f'config:{key}': value for key, value in default_configs.items()})
+        
         logger.info("Redis initialization completed successfully")
         
     except Exception as e:
@@ -221,9 +221,10 @@ def create_seed_data():
     logger.info("Creating seed data...")
     
     try:
-        engine = create_engine(POSTGRES_URL)
+        engine = get_engine()
         
-        with engine.connect() as conn:
+        # engine.begin() commits when the block exits
+        with engine.begin() as conn:
             # Create default organization
             result = conn.execute(text("""
                 INSERT INTO organizations (name, type, license_type)
@@ -245,8 +246,6 @@ def create_seed_data():
                 ON CONFLICT (email) DO NOTHING;
             """))
             
-            conn.commit()
-            
         logger.info("Seed data created successfully")
         
     except Exception as e:
@@ -257,10 +256,11 @@ def main():
     logger.info("Starting PharmOS database initialization...")
     
     try:
-        # Initialize databases
-        init_postgres()
-        init_mongodb()
-        init_redis()
+        # Initialize databases concurrently; each talks to an independent service
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(init) for init in (init_postgres, init_mongodb, init_redis)]
+            for future in futures:
+                future.result()
         
         # Create seed data
         if os.getenv('CREATE_SEED_DATA', 'true').lower() == 'true':
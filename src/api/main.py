@@ -1,48 +1,127 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+from contextlib import asynccontextmanager
+from dataclasses import replace
+from functools import lru_cache
+from collections import OrderedDict
+import hashlib
+import itertools
+import asyncio
+import time
+import anyio.to_thread
 import uvicorn
 import logging
+import orjson
+from arq import create_pool
+from arq.jobs import Job, JobStatus
 from datetime import datetime
 import os
 import sys
 from dotenv import load_dotenv
 
+# Load environment variables before importing services that read them at import time
+load_dotenv()
+
 # Add ML module to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../ml'))
 from services.ml_service import ml_service
-
-# Load environment variables
-load_dotenv()
+from services.task_queue import REDIS_SETTINGS
 
 # Configure logging
 logging.basicConfig(
-    level=logging.INFO,
+    level=os.getenv("LOG_LEVEL", "WARNING").upper(),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+# Fail fast when Redis is down so API requests are not held up by reconnect attempts
+TASK_QUEUE_SETTINGS = replace(REDIS_SETTINGS, conn_timeout=2, conn_retries=0)
+# Seconds to wait after a failed connect before trying Redis again
+TASK_QUEUE_RETRY_SECONDS = 10
+
+# Similarity results are deterministic, so serialized responses are cached in-process,
+# bounded by total bytes per worker; larger responses are not cached at all
+SIMILARITY_CACHE_MAX_BYTES = 32 * 1024 * 1024
+SIMILARITY_CACHE_MAX_BODY = 256 * 1024
+
+async def _get_task_queue(app: FastAPI):
+    """Return the arq Redis pool, connecting if needed; None while Redis is unreachable"""
+    if app.state.task_queue is not None:
+        return app.state.task_queue
+    
+    # One connect attempt at a time, and none during the backoff after a failure
+    async with app.state.task_queue_lock:
+        if app.state.task_queue is None and time.monotonic() >= app.state.task_queue_retry_at:
+            try:
+                app.state.task_queue = await create_pool(TASK_QUEUE_SETTINGS)
+            except Exception as e:
+                app.state.task_queue_retry_at = time.monotonic() + TASK_QUEUE_RETRY_SECONDS
+                logger.warning("Task queue unavailable, retrying in %ds: %s", TASK_QUEUE_RETRY_SECONDS, e)
+    return app.state.task_queue
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Size the threadpool that runs ML calls; ML_THREADS overrides anyio's default of 40
+    ml_threads = os.getenv("ML_THREADS")
+    if ml_threads:
+        anyio.to_thread.current_default_thread_limiter().total_tokens = int(ml_threads)
+    
+    # Connect to the task queue up front; a failure here is retried on first use
+    app.state.task_queue = None
+    app.state.task_queue_lock = asyncio.Lock()
+    app.state.task_queue_retry_at = 0.0
+    await _get_task_queue(app)
+    yield
+    if app.state.task_queue is not None:
+        await app.state.task_queue.close()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="PharmOS ML Service",
     description="Machine Learning and AI services for pharmaceutical research",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Per-process sequence that keeps generated IDs unique within the same nanosecond
+_id_counter = itertools.count()
+
+def _new_id(prefix: str) -> str:
+    """Unique task/job ID from the clock, process and a counter"""
+    return f"{prefix}-{time.time_ns():x}-{os.getpid():x}-{next(_id_counter):x}"
+
+# Molecules predicted per threadpool hop when streaming batch results
+STREAM_CHUNK_SIZE = 256
+
+# Configure CORS for an explicit allowlist (the Vite dev frontend by default); set CORS_ORIGINS
+# to an empty value to skip the middleware entirely for internal deployments
+CORS_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("CORS_ORIGINS", "http://localhost:3001").split(",")
+    if origin.strip()
+]
+if CORS_ORIGINS:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["GET", "POST"],
+        allow_headers=["authorization", "content-type"],
+    )
+
+# Compress larger payloads such as similarity rankings and batch results
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 # Pydantic models
 class MoleculeRequest(BaseModel):
     smiles: str
-    properties: Optional[List[str]] = []
+    properties: Optional[List[str]] = None
 
 class MoleculeResponse(BaseModel):
     smiles: str
@@ -52,7 +131,7 @@ class MoleculeResponse(BaseModel):
 
 class ResearchQuery(BaseModel):
     query: str
-    filters: Optional[Dict[str, Any]] = {}
+    filters: Optional[Dict[str, Any]] = None
     limit: int = 10
 
 class PredictionRequest(BaseModel):
@@ -60,6 +139,9 @@ class PredictionRequest(BaseModel):
     target: str
     model_type: str = "default"
 
+class BatchPredictionRequest(BaseModel):
+    smiles_list: List[str]
+
 class SafetyAnalysisRequest(BaseModel):
     compound: str
     dose: Optional[float] = None
@@ -70,75 +152,152 @@ class SafetyAnalysisRequest(BaseModel):
 async def health_check():
     return {
         "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": datetime.utcnow(),
         "service": "PharmOS ML Service",
         "version": "0.1.0"
     }
 
 # ML Model endpoints
-@app.post("/api/v1/ml/predict", response_model=Dict[str, Any])
+@app.post("/api/v1/ml/predict")
 async def predict(request: PredictionRequest):
     """
     Make predictions using trained ML models
     """
-    logger.info(f"Prediction request for molecule: {request.molecule}")
+    logger.info("Prediction request for molecule: %s", request.molecule)
     
     if request.model_type == "activity":
-        result = ml_service.predict_activity(request.molecule, request.target)
+        result = await run_in_threadpool(ml_service.predict_activity, request.molecule, request.target)
     else:
-        result = ml_service.predict_properties(request.molecule)
+        result = await run_in_threadpool(ml_service.predict_properties, request.molecule)
     
     if not result.get('success'):
         raise HTTPException(status_code=400, detail=result.get('error', 'Prediction failed'))
     
-    return {
+    # Serialize the nested prediction with orjson directly rather than through jsonable_encoder
+    return ORJSONResponse(content={
         "molecule": request.molecule,
         "target": request.target,
         "prediction": result,
         "model_version": "0.1.0"
-    }
+    })
+
+@app.post("/api/v1/ml/predict/batch")
+async def predict_batch(request: BatchPredictionRequest):
+    """
+    Predict properties for a batch of molecules
+    """
+    logger.info("Batch prediction request: %d molecules", len(request.smiles_list))
+    
+    # Run the batch off the event loop so other requests are not blocked
+    return await run_in_threadpool(ml_service.batch_predict, request.smiles_list)
 
-@app.post("/api/v1/ml/molecule/properties", response_model=MoleculeResponse)
+@app.post("/api/v1/ml/predict/batch/stream")
+async def predict_batch_stream(request: BatchPredictionRequest):
+    """
+    Stream batch predictions as newline-delimited JSON, one molecule per line
+    """
+    logger.info("Streaming batch prediction request: %d molecules", len(request.smiles_list))
+    
+    async def stream_results():
+        smiles_list = request.smiles_list
+        for start in range(0, len(smiles_list), STREAM_CHUNK_SIZE):
+            # Predict a chunk at a time so results reach the client before the whole batch is done
+            batch = await run_in_threadpool(ml_service.batch_predict, smiles_list[start:start + STREAM_CHUNK_SIZE])
+            yield b"".join(
+                orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+                for result in batch['results']
+            )
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+# MoleculeResponse documents the payload; returning ORJSONResponse directly skips both
+# FastAPI's jsonable_encoder walk and response_model validation for our own service's dict
+@app.post("/api/v1/ml/molecule/properties", responses={200: {"model": MoleculeResponse}})
 async def calculate_molecule_properties(request: MoleculeRequest):
     """
     Calculate molecular properties from SMILES string
     """
-    logger.info(f"Property calculation for SMILES: {request.smiles}")
+    logger.info("Property calculation for SMILES: %s", request.smiles)
     
-    result = ml_service.predict_properties(request.smiles)
+    result = await run_in_threadpool(ml_service.predict_properties, request.smiles)
     
     if not result.get('success'):
         raise HTTPException(status_code=400, detail=result.get('error', 'Property calculation failed'))
     
     predictions = result.get('predictions', {})
-    return MoleculeResponse(
-        smiles=request.smiles,
-        molecular_weight=predictions.get('molecular_weight'),
-        logp=predictions.get('logP'),
-        properties=predictions
-    )
+    return ORJSONResponse(content={
+        "smiles": request.smiles,
+        "molecular_weight": predictions.get('molecular_weight'),
+        "logp": predictions.get('logP'),
+        "properties": predictions
+    })
+
+_similarity_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_similarity_cache_bytes = 0
+
+def _similarity_key(reference: str, candidates: List[str], method: str) -> str:
+    """Stable cache key for a similarity query, scoped to the current model version"""
+    # Candidate order is kept: ties in the ranking preserve input order, so it affects the response
+    data = f"{reference}|{method}|" + "\n".join(candidates)
+    digest = hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+    return f"similarity:{ml_service.predictor.model_version}:{digest}"
+
+def _remember_similarity(key: str, body: bytes):
+    """Store a response in the in-process LRU, evicting until it fits the byte budget"""
+    global _similarity_cache_bytes
+    old = _similarity_cache.pop(key, None)
+    if old is not None:
+        _similarity_cache_bytes -= len(old)
+    _similarity_cache[key] = body
+    _similarity_cache_bytes += len(body)
+    while _similarity_cache_bytes > SIMILARITY_CACHE_MAX_BYTES:
+        _, evicted = _similarity_cache.popitem(last=False)
+        _similarity_cache_bytes -= len(evicted)
 
 @app.post("/api/v1/ml/similarity")
 async def calculate_similarity(reference: str, candidates: List[str], method: str = "tanimoto"):
     """
     Calculate molecular similarity between compounds
     """
-    logger.info(f"Similarity calculation: {len(candidates)} candidates")
+    logger.info("Similarity calculation: %d candidates", len(candidates))
     
-    similarities = []
-    for candidate in candidates:
-        result = ml_service.calculate_similarity(reference, candidate)
-        if result.get('success'):
-            similarities.append({
-                "smiles": candidate,
-                "similarity": result['similarity']
-            })
+    key = _similarity_key(reference, candidates, method)
+    body = _similarity_cache.get(key)
+    if body is not None:
+        _similarity_cache.move_to_end(key)
+        return Response(content=body, media_type="application/json")
     
-    return {
+    result = await run_in_threadpool(ml_service.calculate_similarity_batch, reference, candidates)
+    similarities = result['similarities'] if result.get('success') else []
+    
+    body = orjson.dumps({
         "reference": reference,
         "method": "jaccard",  # Using simple method for now
         "similarities": sorted(similarities, key=lambda x: x['similarity'], reverse=True)
-    }
+    })
+    # Very large rankings are not worth the memory; they would also churn the whole LRU
+    if len(body) <= SIMILARITY_CACHE_MAX_BODY:
+        _remember_similarity(key, body)
+    return Response(content=body, media_type="application/json")
+
+@app.post("/api/v1/ml/similarity/stream")
+async def calculate_similarity_stream(reference: str, candidates: List[str], method: str = "tanimoto"):
+    """
+    Stream similarities as newline-delimited JSON in candidate order, one candidate per line
+    """
+    logger.info("Streaming similarity calculation: %d candidates", len(candidates))
+    
+    async def stream_similarities():
+        for start in range(0, len(candidates), STREAM_CHUNK_SIZE):
+            # Score a chunk at a time so large candidate sets are never held serialized in full
+            result = await run_in_threadpool(
+                ml_service.calculate_similarity_batch, reference, candidates[start:start + STREAM_CHUNK_SIZE]
+            )
+            if not result.get('success'):
+                return
+            yield b"".join(orjson.dumps(record) + b"\n" for record in result['similarities'])
+    
+    return StreamingResponse(stream_similarities(), media_type="application/x-ndjson")
 
 @app.post("/api/v1/ml/generate")
 async def generate_molecules(scaffold: Optional[str] = None, properties: Optional[Dict[str, float]] = None):
@@ -151,7 +310,7 @@ async def generate_molecules(scaffold: Optional[str] = None, properties: Optiona
         # Use a default scaffold if none provided
         scaffold = "CC(C)Cc1ccc(cc1)C(C)C(=O)O"  # Ibuprofen as example
     
-    result = ml_service.generate_analogs(scaffold, n_analogs=5)
+    result = await run_in_threadpool(ml_service.generate_analogs, scaffold, n_analogs=5)
     
     if not result.get('success'):
         raise HTTPException(status_code=400, detail=result.get('error', 'Generation failed'))
@@ -169,7 +328,7 @@ async def analyze_research(query: ResearchQuery):
     """
     Analyze research literature using AI
     """
-    logger.info(f"Research analysis: {query.query}")
+    logger.info("Research analysis: %s", query.query)
     
     # TODO: Implement research analysis
     return {
@@ -187,7 +346,7 @@ async def extract_entities(text: str, entity_types: List[str] = ["drug", "diseas
     """
     Extract biomedical entities from text
     """
-    logger.info(f"Entity extraction from text (length: {len(text)})")
+    logger.info("Entity extraction from text (length: %d)", len(text))
     
     # TODO: Implement entity extraction
     return {
@@ -197,15 +356,18 @@ async def extract_entities(text: str, entity_types: List[str] = ["drug", "diseas
     }
 
 # Safety AI endpoints
+# Ordinal codes for toxicity risk levels; unknown levels count as low
+RISK_CODES = {'low': 0, 'medium': 1, 'high': 2}
+
 @app.post("/api/v1/ai/safety/predict")
 async def predict_safety(request: SafetyAnalysisRequest):
     """
     Predict safety profile of compounds
     """
-    logger.info(f"Safety prediction for: {request.compound}")
+    logger.info("Safety prediction for: %s", request.compound)
     
     # Get ADMET predictions which include toxicity
-    result = ml_service.predict_admet(request.compound)
+    result = await run_in_threadpool(ml_service.predict_admet, request.compound)
     
     if not result.get('success'):
         raise HTTPException(status_code=400, detail=result.get('error', 'Safety prediction failed'))
@@ -213,8 +375,7 @@ async def predict_safety(request: SafetyAnalysisRequest):
     toxicity = result['admet']['toxicity']
     
     # Calculate overall risk
-    risk_scores = {'low': 0, 'medium': 1, 'high': 2}
-    avg_risk = sum(risk_scores.get(v, 0) for v in toxicity.values()) / len(toxicity)
+    avg_risk = sum(RISK_CODES.get(v, 0) for v in toxicity.values()) / len(toxicity)
     
     if avg_risk < 0.5:
         risk_category = "low"
@@ -238,7 +399,7 @@ async def predict_interactions(drugs: List[str]):
     """
     Predict drug-drug interactions
     """
-    logger.info(f"Interaction prediction for {len(drugs)} drugs")
+    logger.info("Interaction prediction for %d drugs", len(drugs))
     
     # TODO: Implement interaction prediction
     return {
@@ -249,98 +410,170 @@ async def predict_interactions(drugs: List[str]):
     }
 
 # Agent endpoints
+async def _enqueue(function: str, job_id: str, *args: Any) -> str:
+    """Hand a long-running job to the arq workers and return its ID"""
+    queue = await _get_task_queue(app)
+    if queue is None:
+        raise HTTPException(status_code=503, detail="Task queue unavailable")
+    
+    try:
+        await queue.enqueue_job(function, *args, _job_id=job_id)
+    except Exception as e:
+        logger.error("Failed to enqueue %s: %s", function, e)
+        raise HTTPException(status_code=503, detail="Task queue unavailable")
+    return job_id
+
 @app.post("/agent/research")
 async def research_agent(task: Dict[str, Any]):
     """
     Research agent endpoint for literature analysis
+    
+    Queues the task for the arq workers (503 if Redis is unavailable). The agent is not
+    implemented yet: the job completes with an "implementation pending" message as its result.
     """
     logger.info("Research agent task received")
     
-    # TODO: Implement research agent
+    task_id = await _enqueue("run_research_agent", _new_id("TASK"), task)
     return {
-        "task_id": f"TASK-{datetime.utcnow().timestamp()}",
-        "status": "pending",
-        "message": "Research agent - implementation pending"
+        "task_id": task_id,
+        "status": "queued",
+        "message": "Research agent task queued"
     }
 
 @app.post("/agent/molecule")
 async def molecule_agent(task: Dict[str, Any]):
     """
     Molecule design agent endpoint
+    
+    Queues the task for the arq workers (503 if Redis is unavailable). The agent is not
+    implemented yet: the job completes with an "implementation pending" message as its result.
     """
     logger.info("Molecule agent task received")
     
-    # TODO: Implement molecule agent
+    task_id = await _enqueue("run_molecule_agent", _new_id("TASK"), task)
     return {
-        "task_id": f"TASK-{datetime.utcnow().timestamp()}",
-        "status": "pending",
-        "message": "Molecule agent - implementation pending"
+        "task_id": task_id,
+        "status": "queued",
+        "message": "Molecule agent task queued"
     }
 
 @app.post("/agent/clinical")
 async def clinical_agent(task: Dict[str, Any]):
     """
     Clinical trials agent endpoint
+    
+    Queues the task for the arq workers (503 if Redis is unavailable). The agent is not
+    implemented yet: the job completes with an "implementation pending" message as its result.
     """
     logger.info("Clinical agent task received")
     
-    # TODO: Implement clinical agent
+    task_id = await _enqueue("run_clinical_agent", _new_id("TASK"), task)
     return {
-        "task_id": f"TASK-{datetime.utcnow().timestamp()}",
-        "status": "pending",
-        "message": "Clinical agent - implementation pending"
+        "task_id": task_id,
+        "status": "queued",
+        "message": "Clinical agent task queued"
     }
 
 @app.post("/agent/safety")
 async def safety_agent(task: Dict[str, Any]):
     """
     Safety monitoring agent endpoint
+    
+    Queues the task for the arq workers (503 if Redis is unavailable). The agent is not
+    implemented yet: the job completes with an "implementation pending" message as its result.
     """
     logger.info("Safety agent task received")
     
-    # TODO: Implement safety agent
+    task_id = await _enqueue("run_safety_agent", _new_id("TASK"), task)
     return {
-        "task_id": f"TASK-{datetime.utcnow().timestamp()}",
-        "status": "pending",
-        "message": "Safety agent - implementation pending"
+        "task_id": task_id,
+        "status": "queued",
+        "message": "Safety agent task queued"
     }
 
-# Model management endpoints
-@app.get("/api/v1/models")
-async def list_models():
+@app.get("/agent/status/{task_id}")
+async def agent_status(task_id: str):
     """
-    List available ML models
+    Poll the status of a queued agent or training task
     """
+    queue = await _get_task_queue(app)
+    if queue is None:
+        raise HTTPException(status_code=503, detail="Task queue unavailable")
+    
+    job = Job(task_id, queue)
+    status = await job.status()
+    if status == JobStatus.not_found:
+        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+    
+    response = {
+        "task_id": task_id,
+        "status": status.value
+    }
+    if status == JobStatus.complete:
+        info = await job.result_info()
+        if info is not None:
+            response["success"] = info.success
+            response["result"] = info.result if info.success else str(info.result)
+    return response
+
+# Model management endpoints
+@lru_cache(maxsize=1)
+def _models_payload() -> Tuple[bytes, str]:
+    """Serialize the static model registry once and derive its ETag"""
     result = ml_service.get_model_info()
     
     if not result.get('success'):
         raise HTTPException(status_code=500, detail="Failed to retrieve models")
     
-    return {
-        "models": result['models']
-    }
+    body = orjson.dumps({"models": result['models']})
+    return body, f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+@app.get("/api/v1/models")
+async def list_models(request: Request):
+    """
+    List available ML models
+    """
+    body, etag = _models_payload()
+    
+    # Clients that already hold this registry get a body-less 304
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 @app.post("/api/v1/models/train")
 async def train_model(model_name: str, dataset: str, hyperparameters: Optional[Dict[str, Any]] = None):
     """
     Trigger model training
+    
+    Queues the job for the arq workers (503 if Redis is unavailable). The training pipeline is not
+    implemented yet: the job completes with an "implementation pending" message as its result.
     """
-    logger.info(f"Training request for model: {model_name}")
+    logger.info("Training request for model: %s", model_name)
     
-    # TODO: Implement model training pipeline
+    job_id = await _enqueue("train_model", _new_id("JOB"), model_name, dataset, hyperparameters)
     return {
-        "job_id": f"JOB-{datetime.utcnow().timestamp()}",
+        "job_id": job_id,
         "model_name": model_name,
         "status": "queued",
-        "message": "Model training - implementation pending"
+        "message": "Model training task queued"
     }
 
 if __name__ == "__main__":
     port = int(os.getenv("API_PORT", 8000))
+    
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=port,
         reload=True if os.getenv("NODE_ENV") == "development" else False,
-        log_level="info"
+        log_level="info",
+        # Per-request access logging is a serialized write on every call
+        access_log=False,
+        # Absorb bursts from notebooks and pipelines, and keep idle client sockets open
+        # between calls so they are not forced to reconnect
+        backlog=4096,
+        limit_concurrency=int(os.getenv("LIMIT_CONCURRENCY") or 1024),
+        timeout_keep_alive=30,
+        h11_max_incomplete_event_size=64 * 1024
     )
\ No newline at end of file
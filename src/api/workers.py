@@ -0,0 +1,15 @@
+"""
+Gunicorn worker classes for the PharmOS ML service
+"""
+
+import os
+from uvicorn.workers import UvicornWorker
+
+class PharmOSUvicornWorker(UvicornWorker):
+    """UvicornWorker with the connection limits Gunicorn has no settings for"""
+    CONFIG_KWARGS = {
+        **UvicornWorker.CONFIG_KWARGS,
+        # Per-worker cap on concurrent connections and tasks; requests beyond it get a 503
+        "limit_concurrency": int(os.getenv("LIMIT_CONCURRENCY") or 1024),
+        "h11_max_incomplete_event_size": 64 * 1024
+    }
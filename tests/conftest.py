@@ -0,0 +1,12 @@
+"""
+Shared pytest setup for the PharmOS Python services
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The ML service and the API are run from their own directories, not installed as packages
+sys.path.insert(0, os.path.join(ROOT, 'ml'))
+sys.path.insert(0, os.path.join(ROOT, 'src', 'api'))
@@ -0,0 +1,46 @@
+"""
+Tests for SMILES validation in the ML service
+"""
+
+import pytest
+
+from services.ml_service import ml_service
+
+@pytest.mark.parametrize("smiles", [
+    "C",
+    "CCO",
+    "c1ccccc1",
+    "CC(=O)Oc1ccccc1C(=O)O",
+    "C[C@@H](N)C(=O)O",
+    "[Na+].[Cl-]",
+    "C%12CC%12",
+    "F/C=C/F",
+    "N#N"
+])
+def test_accepts_well_formed_smiles(smiles):
+    assert ml_service._validate_smiles(smiles) is None
+
+@pytest.mark.parametrize("smiles", [
+    "",
+    None,
+    42,
+    "CC O",
+    "CC\nO",
+    "C{C}",
+    "C(C",
+    "CC)",
+    "[NH4+",
+    "Na+]"
+])
+def test_rejects_malformed_smiles(smiles):
+    assert ml_service._validate_smiles(smiles) == 'invalid SMILES'
+
+def test_invalid_smiles_fail_without_raising():
+    result = ml_service.predict_properties("C(C")
+    assert result['success'] is False
+    assert result['error'] == 'invalid SMILES'
+
+def test_batch_reports_invalid_entries_in_place():
+    result = ml_service.batch_predict(["CCO", "C(C", "c1ccccc1"])
+    successes = [entry['success'] for entry in result['results']]
+    assert successes == [True, False, True]
@@ -0,0 +1,78 @@
+"""
+Tests for request body validation on the predict and safety endpoints
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+
+PREDICT = "/api/v1/ml/predict"
+SAFETY = "/api/v1/ai/safety/predict"
+
+@pytest.fixture(scope="module")
+def client():
+    # No lifespan: these endpoints do not touch Redis
+    return TestClient(app)
+
+def test_predict_accepts_valid_body(client):
+    response = client.post(PREDICT, json={"molecule": "CCO", "target": "EGFR"})
+    assert response.status_code == 200
+    assert response.json()["target"] == "EGFR"
+
+@pytest.mark.parametrize("body", [
+    {"compound": "CCO", "dose": "5"},
+    {"compound": "CCO", "duration": 5.0},
+    {"compound": "CCO", "duration": "7"}
+])
+def test_safety_accepts_lax_coercions(client, body):
+    assert client.post(SAFETY, json=body).status_code == 200
+
+def test_missing_field(client):
+    response = client.post(PREDICT, json={"molecule": "CCO"})
+    assert response.status_code == 422
+    assert response.json()["detail"] == [{
+        "type": "missing",
+        "loc": ["body", "target"],
+        "msg": "Field required",
+        "input": {"molecule": "CCO"}
+    }]
+
+def test_wrong_type(client):
+    response = client.post(SAFETY, json={"compound": "CCO", "duration": 5.5})
+    assert response.status_code == 422
+    [error] = response.json()["detail"]
+    assert error["type"] == "int_from_float"
+    assert error["msg"] == "Input should be a valid integer, got a number with a fractional part"
+    assert error["loc"] == ["body", "duration"]
+    assert error["input"] == 5.5
+
+def test_body_not_an_object(client):
+    response = client.post(PREDICT, json=[1])
+    assert response.status_code == 422
+    [error] = response.json()["detail"]
+    assert error["type"] == "model_attributes_type"
+    assert error["loc"] == ["body"]
+
+def test_non_json_content_type_is_rejected(client):
+    response = client.post(
+        PREDICT,
+        content=b'{"molecule": "CCO", "target": "EGFR"}',
+        headers={"content-type": "text/plain"}
+    )
+    assert response.status_code == 422
+
+def test_empty_body(client):
+    response = client.post(PREDICT)
+    assert response.status_code == 422
+    assert response.json()["detail"] == [
+        {"type": "missing", "loc": ["body"], "msg": "Field required", "input": None}
+    ]
+
+def test_malformed_json(client):
+    response = client.post(PREDICT, content=b"{x", headers={"content-type": "application/json"})
+    assert response.status_code == 422
+    [error] = response.json()["detail"]
+    assert error["type"] == "json_invalid"
+    assert error["loc"] == ["body", 1]
+    assert error["msg"] == "JSON decode error"
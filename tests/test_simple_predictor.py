@@ -0,0 +1,65 @@
+"""
+Tests for ring-closure canonicalization in the simple predictor
+"""
+
+import pytest
+
+from models.simple_predictor import CACHE_MAX_KEY_LENGTH, _canonicalize_ring_ids, predictor
+
+@pytest.mark.parametrize("smiles, expected", [
+    ("CCO", "CCO"),
+    ("C1CC1", "C1CC1"),
+    ("C7CC7", "C1CC1"),
+    ("c9ccccc9", "c1ccccc1"),
+    # Labels follow order of first appearance, not numeric order
+    ("C2CC1CC1C2", "C1CC2CC2C1"),
+    # A label reused after its ring closes stays reused rather than being split
+    ("C3CC3C3CC3", "C1CC1C1CC1"),
+    ("C3CC3C5CC5", "C1CC1C2CC2")
+])
+def test_single_digit_closures_are_renumbered(smiles, expected):
+    assert _canonicalize_ring_ids(smiles) == expected
+
+@pytest.mark.parametrize("smiles, expected", [
+    # Isotopes, hydrogen counts and charges inside brackets are not ring labels
+    ("[13CH3]C2CC2", "[13CH3]C1CC1"),
+    ("C2C[NH3+]C2", "C1C[NH3+]C1"),
+    ("[2H]C5CC5[2H]", "[2H]C1CC1[2H]")
+])
+def test_bracket_atoms_are_left_alone(smiles, expected):
+    assert _canonicalize_ring_ids(smiles) == expected
+
+@pytest.mark.parametrize("smiles, expected", [
+    ("C%12CC%12", "C%12CC%12"),
+    ("C%12C3CC3C%12", "C%12C1CC1C%12")
+])
+def test_two_digit_closures_are_left_alone(smiles, expected):
+    assert _canonicalize_ring_ids(smiles) == expected
+
+def test_all_ten_labels_can_be_assigned():
+    smiles = "C" + "".join(f"{d}C" for d in "9876543210")
+    assert _canonicalize_ring_ids(smiles) == "C" + "".join(f"{d}C" for d in "1234567890")
+
+def test_canonicalization_is_idempotent():
+    once = _canonicalize_ring_ids("C4CC2CC2C4")
+    assert _canonicalize_ring_ids(once) == once
+
+def test_equivalent_smiles_share_predictions():
+    first = predictor.predict_properties("C4CC2CC2C4")
+    second = predictor.predict_properties("C1CC2CC2C1")
+    assert first == second
+    assert predictor.predict_activity("c5ccccc5", "EGFR") == predictor.predict_activity("c1ccccc1", "EGFR")
+
+def test_batch_predictions_match_single_predictions():
+    smiles = ["CCO", "c1ccccc1", "CCO", "C3CC3"]
+    predictor.clear_cache()
+    batch = predictor.predict_properties_batch(smiles)
+    assert batch == [predictor.predict_properties(s) for s in smiles]
+
+def test_long_smiles_are_predicted_but_not_cached():
+    smiles = "C" * (CACHE_MAX_KEY_LENGTH + 1)
+    predictor.clear_cache()
+    first = predictor.predict_properties(smiles)
+    predictor.predict_properties_batch([smiles])
+    assert predictor._cached_predictions.get(smiles) is None
+    assert predictor.predict_properties(smiles) == first